@@ -37,11 +37,13 @@ setup(
         'Development Status :: 5 - Production/Stable',
         'Intended Audience :: Developers',
         'Topic :: Utilities',
+        'Programming Language :: Python :: 3.7',
     ],
     project_urls={
         'Issue Tracker': 'https://github.com/agrc/geocoding-toolbox/issues',
     },
     keywords=['geocoding', 'gis'],
+    python_requires='>=3.7',
     install_requires=['requests==2.23.*'],
     extras_require={
         'release': [
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# * coding: utf8 *
+"""
+An offline geocoder backend that matches addresses against a local address point csv.
+
+Usage: `geocode.execute(api_key, rows, output_directory, backend=AddressPointBackend('address_points.csv'))`.
+"""
+import csv
+from pathlib import Path
+
+try:
+    from .geocode import DEFAULT_ACCEPT_SCORE, GeocodeResult, _cleanse_street, _cleanse_zone
+except ImportError:
+    #: the toolbox ships the modules side by side without a package
+    from geocode import DEFAULT_ACCEPT_SCORE, GeocodeResult, _cleanse_street, _cleanse_zone
+
+LOCAL_LOCATOR_NAME = 'AddressPoints.Local'
+ABBREVIATIONS = {
+    'NORTH': 'N',
+    'SOUTH': 'S',
+    'EAST': 'E',
+    'WEST': 'W',
+    'AVENUE': 'AVE',
+    'BOULEVARD': 'BLVD',
+    'CIRCLE': 'CIR',
+    'COURT': 'CT',
+    'DRIVE': 'DR',
+    'HIGHWAY': 'HWY',
+    'LANE': 'LN',
+    'PARKWAY': 'PKWY',
+    'PLACE': 'PL',
+    'ROAD': 'RD',
+    'STREET': 'ST',
+}
+DIRECTIONS = ('N', 'S', 'E', 'W')
+STREET_TYPES = ('AVE', 'BLVD', 'CIR', 'CT', 'DR', 'HWY', 'LN', 'PKWY', 'PL', 'RD', 'ST', 'WAY')
+
+
+def _tokenize_address(street):
+    """street: a cleansed street
+    returns the house number and the normalized tokens of the street name
+    """
+    tokens = [ABBREVIATIONS.get(token, token) for token in street.upper().split(' ') if token]
+
+    if not tokens or not tokens[0].isdigit():
+        return None, tokens
+
+    return tokens[0], tokens[1:]
+
+
+def _parse_street(tokens):
+    """tokens: the normalized tokens of a street name
+    returns the prefix direction, street name, street type and suffix direction so that grid addresses like
+    100 E 200 S and 100 S 200 E stay different streets
+    """
+    tokens = list(tokens)
+    prefix_direction = street_type = suffix_direction = ''
+
+    if len(tokens) > 1 and tokens[0] in DIRECTIONS:
+        prefix_direction = tokens.pop(0)
+
+    if len(tokens) > 1 and tokens[-1] in DIRECTIONS:
+        suffix_direction = tokens.pop()
+
+    if len(tokens) > 1 and tokens[-1] in STREET_TYPES:
+        street_type = tokens.pop()
+
+    return prefix_direction, tuple(tokens), street_type, suffix_direction
+
+
+def _score_street(input_street, candidate_street):
+    """input_street, candidate_street: parsed streets from `_parse_street`
+    returns a 0-100 score for how well the streets match. A conflicting direction or street type costs much more than
+    one that is left out
+    """
+    input_name = input_street[1]
+    candidate_name = candidate_street[1]
+
+    score = 100
+
+    if input_name != candidate_name:
+        shared = len(set(input_name) & set(candidate_name))
+        similarity = 2 * shared / (len(set(input_name)) + len(set(candidate_name)) or 1)
+
+        score -= 60 * (1 - similarity)
+
+    #: prefix direction, street type and suffix direction
+    for position, conflict in ((0, 25), (2, 15), (3, 25)):
+        input_part = input_street[position]
+        candidate_part = candidate_street[position]
+
+        if input_part == candidate_part:
+            continue
+
+        score -= conflict if input_part and candidate_part else 5
+
+    return max(round(score), 0)
+
+
+class AddressPointBackend():
+    """Geocodes offline against an in-memory index of a local address point csv
+
+    The csv needs a street address field, one or more zone fields (city names or zip codes) and x and y fields.
+    Coordinates are returned as they are stored in the csv. Scores are on the same 0-100 scale as the web api.
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        address_points,
+        street_field='address',
+        zone_fields=('zone',),
+        x_field='x',
+        y_field='y',
+        acceptScore=DEFAULT_ACCEPT_SCORE
+    ):
+        # pylint: disable=too-many-arguments
+        self.address_points = Path(address_points)
+        self.street_field = street_field
+        self.zone_fields = zone_fields
+        self.x_field = x_field
+        self.y_field = y_field
+        self.accept_score = acceptScore
+        self.index = None
+        self.skipped = 0
+
+    @property
+    def settings(self):
+        """the settings that change the results of this backend
+        """
+        fields = (self.street_field, *self.zone_fields, self.x_field, self.y_field)
+
+        return '|'.join((str(self.address_points.resolve()), *fields, str(self.accept_score)))
+
+    def __str__(self):
+        if self.index is None:
+            return f'local address points ({self.address_points})'
+
+        return f'local address points ({self.address_points}, {self.skipped} points skipped)'
+
+    def __enter__(self):
+        if self.index is None:
+            self.index = self.build_index()
+
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def build_index(self):
+        """read the address points into a dictionary of (zone, house number) -> candidates
+        points without a street or house number or with coordinates that are not numbers are skipped and counted
+        """
+        index = {}
+
+        with open(self.address_points, newline='', encoding='utf-8') as address_file:
+            reader = csv.DictReader(address_file)
+            fields = (self.street_field, *self.zone_fields, self.x_field, self.y_field)
+            missing = [field for field in fields if field not in (reader.fieldnames or ())]
+
+            if missing:
+                raise ValueError(f'{self.address_points} is missing the {", ".join(missing)} fields')
+
+            for point in reader:
+                candidate = self._parse_point(point)
+
+                if candidate is None:
+                    self.skipped += 1
+
+                    continue
+
+                house_number, candidate_street, address, location = candidate
+
+                for zone_field in self.zone_fields:
+                    zone = _cleanse_zone(point[zone_field] or '').upper()
+
+                    if not zone:
+                        continue
+
+                    candidates = index.setdefault((zone, house_number), [])
+                    candidates.append((candidate_street, address, zone, location))
+
+        return index
+
+    def _parse_point(self, point):
+        """point: a row of the address point csv
+        returns the house number, parsed street, address and location of the point or None when it can not be used
+        """
+        if point[self.street_field] is None:
+            return None
+
+        address = _cleanse_street(point[self.street_field])
+        house_number, tokens = _tokenize_address(address)
+
+        if house_number is None:
+            return None
+
+        try:
+            location = (float(point[self.x_field]), float(point[self.y_field]))
+        except (TypeError, ValueError):
+            return None
+
+        return house_number, _parse_street(tokens), address.upper(), location
+
+    def geocode(self, street, zone, timer):
+        """street: a cleansed street
+        zone: a cleansed zone
+        timer: the phase timer for the current row
+        returns a status code and a GeocodeResult or an error message like the web api
+        """
+        house_number, tokens = _tokenize_address(street)
+        input_street = _parse_street(tokens)
+
+        best_score = -1
+        best = None
+        for candidate in self.index.get((zone.upper(), house_number), ()):
+            candidate_score = _score_street(input_street, candidate[0])
+
+            if candidate_score > best_score:
+                best_score = candidate_score
+                best = candidate
+
+        timer.lap('match')
+
+        if best is None or best_score < self.accept_score:
+            return 404, f'No address candidates found with a score of {self.accept_score} or better.'
+
+        _, address, address_grid, location = best
+
+        return 200, GeocodeResult(
+            location[0], location[1], best_score, LOCAL_LOCATOR_NAME, f'{address}, {address_grid}',
+            ' '.join([house_number] + tokens).lower(), address_grid
+        )
@@ -5,19 +5,28 @@ Tools for geocoding addresses using AGRC's geocoding web service.
 
 CLI usage: `python geocode.py --help`.
 """
+import cProfile
 import csv
+import hashlib
+import heapq
 import json
 import random
 import re
 import time
-from json.decoder import JSONDecodeError
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from string import Template
+from urllib.parse import quote, urlencode
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+try:
+    from orjson import loads as _loads
+except ImportError:
+    #: fall back to the standard library decoder
+    from json import loads as _loads
+
 BRANCH = 'master'
 VERSION_JSON_FILE = 'tool-version.json'
 VERSION_CHECK_URL = 'https://raw.githubusercontent.com/agrc/geocoding-toolbox/{}/{}'.format(BRANCH, VERSION_JSON_FILE)
@@ -35,6 +44,11 @@ HEADER = (
     'addressGrid', 'message'
 )
 HEALTH_PROBE_COUNT = 25
+PROFILE_PHASES = ('cleanse', 'wait', 'connect', 'server', 'decode', 'match', 'write', 'error')
+PROFILE_OUTPUTS = ('cprofile', 'pyinstrument')
+DEFAULT_PROFILE_SLOWEST = 0
+SERVER_TIMING_DURATION = re.compile(r'dur=([0-9]+(?:\.[0-9]+)?)')
+NUMBER = re.compile(r'[0-9]+(?:\.[0-9]+)?')
 
 
 def _cleanse_street(data):
@@ -62,6 +76,77 @@ def _cleanse_zone(data):
     return zone
 
 
+def _fingerprint(street, zone):
+    """street: a cleansed street
+    zone: a cleansed zone
+    returns a compact hash used to tell if the input of a row has changed between runs
+    """
+    return hashlib.blake2b(f'{street}|{zone}'.upper().encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _get_fingerprint_path(results):
+    """results: path to a results csv
+    returns the path of the fingerprint index that sits next to it
+    """
+    return results.with_name(f'{results.stem}_fingerprints.csv')
+
+
+def _open_fingerprint_writer(stack, results, settings):
+    """stack: the ExitStack that closes the file
+    results: path to the new results csv
+    settings: the result settings of the current backend
+    returns a csv writer for the fingerprint index of `results` with the settings in its header
+    """
+    fingerprint_file = stack.enter_context(open(_get_fingerprint_path(results), 'w', newline='', encoding='utf-8'))
+
+    writer = csv.writer(fingerprint_file)
+    writer.writerow(('primary_key', 'fingerprint', settings))
+
+    return writer
+
+
+def _read_previous_results(results, settings, add_message):
+    """results: path to a previous results csv
+    settings: the result settings of the current backend
+    add_message: the function that log messages are sent to
+    returns a dictionary of primary_key -> (fingerprint, result fields) for the rows that were matched.
+    The dictionary is empty when the fingerprint index is missing or was made with different settings
+    so that every row is geocoded again.
+    """
+    fingerprint_path = _get_fingerprint_path(results)
+
+    if not fingerprint_path.exists():
+        add_message(f'No fingerprint index found for {results}. Geocoding every row.')
+
+        return {}
+
+    with open(fingerprint_path, newline='', encoding='utf-8') as fingerprint_file:
+        reader = csv.reader(fingerprint_file)
+        header = next(reader, ('primary_key', 'fingerprint', None))
+
+        if header[-1] != settings:
+            add_message(f'{results} was geocoded with different settings ({header[-1]}). Geocoding every row.')
+
+            return {}
+
+        fingerprints = dict(reader)
+
+    previous = {}
+
+    with open(results, newline='', encoding='utf-8') as results_file:
+        reader = csv.reader(results_file)
+        next(reader)
+
+        for primary_key, *fields in reader:
+            #: re-geocode failures since they may have been transient or fixed by newer address data
+            if fields[-1] or primary_key not in fingerprints:
+                continue
+
+            previous[primary_key] = (fingerprints[primary_key], fields)
+
+    return previous
+
+
 def _format_time(seconds):
     """seconds: number
     returns a human-friendly string describing the amount of time
@@ -81,6 +166,91 @@ def _format_time(seconds):
     return '{} hours'.format(round(seconds / hour, 2))
 
 
+def _get_server_time_ns(headers):
+    """headers: response headers
+    returns the server processing time reported in the `Server-Timing` or `X-Response-Time` headers in nanoseconds
+    """
+    server_timing = headers.get('Server-Timing')
+    if server_timing:
+        durations = SERVER_TIMING_DURATION.findall(server_timing)
+
+        if durations:
+            return int(max(float(duration) for duration in durations) * 1e6)
+
+    response_time = NUMBER.search(headers.get('X-Response-Time', ''))
+    if response_time:
+        return int(float(response_time.group()) * 1e6)
+
+    return 0
+
+
+@contextmanager
+def _run_profiler(kind, path, add_message):
+    """profile the whole run with cProfile or pyinstrument and save the report next to `path`
+    """
+    if kind is None:
+        yield
+
+        return
+
+    if kind == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            output = path.with_suffix('.prof')
+            profiler.dump_stats(output)
+
+            add_message(f'cProfile output: {output}')
+
+        return
+
+    try:
+        from pyinstrument import Profiler  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        add_message('pyinstrument is not installed. Skipping the whole run profile.')
+        yield
+
+        return
+
+    profiler = Profiler()
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        output = path.with_suffix('.html')
+        output.write_text(profiler.output_html(), encoding='utf-8')
+
+        add_message(f'pyinstrument output: {output}')
+
+
+def _read_csv_rows(path, id_field, street_field, zone_field):
+    """open csv and yield data for geocoding
+    """
+    with open(path) as input_file:
+        reader = csv.DictReader(input_file)
+        for row in reader:
+            yield (row[id_field], row[street_field], row[zone_field])
+
+
+def _get_phase_timer(profile, profile_slowest, profile_output, add_message):
+    """returns the phase timer and the whole run profiler for the profile options of `execute`
+    """
+    if profile_output is not None and profile_output not in PROFILE_OUTPUTS:
+        raise ValueError(f'profile_output must be one of {PROFILE_OUTPUTS}')
+
+    if not profile:
+        return _NullPhaseTimer(), None
+
+    add_message(f'profile_slowest: {profile_slowest}')
+    add_message(f'profile_output: {profile_output}')
+
+    return _PhaseTimer(profile_slowest), profile_output
+
+
 def _get_retry_session():
     """create a requests session that has a retry built into it
     """
@@ -117,7 +287,13 @@ def execute(
     pobox=DEFAULT_POBOX,
     acceptScore=DEFAULT_ACCEPT_SCORE,
     add_message=print,
-    ignore_failures=False
+    ignore_failures=False,
+    profile=False,
+    profile_slowest=DEFAULT_PROFILE_SLOWEST,
+    profile_output=None,
+    backend=None,
+    previous_results=None,
+    run_name=None
 ):
     """Geocode an iterator of data.
 
@@ -128,24 +304,45 @@ def execute(
     locator           = determines what locators are used ('all', 'roadCenterlines', or 'addressPoints')
     add_message       = the function that log messages are sent to
     ignore_failure    = used to ignore the short-circut on multiple subsequent failures at the beginning of the job
+    profile           = record the time spent in each phase of the pipeline and log a summary table
+    profile_slowest   = when profiling, the number of slowest rows to write to a per row timing csv
+    profile_output    = when profiling, profile the whole run with 'cprofile' or 'pyinstrument'
+    backend           = the geocoder backend to send rows to. Defaults to a WebApiBackend built from the arguments above
+    previous_results  = path to the results csv of a previous run. Matched rows whose street and zone have not changed
+                        are carried forward instead of being geocoded again. Every row is geocoded when the previous
+                        run used different backend settings. Every run writes the fingerprint index that this needs
+    run_name          = used to name the output files. Defaults to a timestamp
     """
     # pylint: disable=too-many-arguments
     # pylint: disable=too-many-locals
     # pylint: disable=too-many-statements
-    url_template = Template(f'https://{HOST}/api/v1/geocode/$street/$zone')
+    if backend is None:
+        backend = WebApiBackend(
+            api_key,
+            spatial_reference=spatial_reference,
+            locators=locators,
+            pobox=pobox,
+            acceptScore=acceptScore
+        )
+
+        add_message(f'api_key: {api_key}')
+        add_message(f'spatial_reference: {spatial_reference}')
+        add_message(f'locators: {locators}')
+        add_message(f'pobox: {pobox}')
+        add_message(f'acceptScore: {acceptScore}')
+
     sequential_fails = 0
     success = 0
     fail = 0
     score = 0
     total = 0
+    carried = 0
 
-    add_message(f'api_key: {api_key}')
     add_message(f'output_directory: {output_directory}')
-    add_message(f'spatial_reference: {spatial_reference}')
-    add_message(f'locators: {locators}')
-    add_message(f'pobox: {pobox}')
-    add_message(f'acceptScore: {acceptScore}')
     add_message(f'ignore_failures: {ignore_failures}')
+    add_message(f'previous_results: {previous_results}')
+
+    timer, profile_output = _get_phase_timer(profile, profile_slowest, profile_output, add_message)
 
     def log_status():
         try:
@@ -160,26 +357,44 @@ def execute(
         add_message(f'Total requests: {total}')
         add_message(f'Failure rate: {failure_rate}%')
         add_message(f'Average score: {average_score}')
+
+        if previous_results is not None:
+            add_message(f'Carried forward: {carried}')
+
         add_message(f'Time taken: {_format_time(time.perf_counter() - start)}')
 
     #: convert strings to path objects
     output_directory = Path(output_directory)
 
-    UNIQUE_RUN = time.strftime('%Y%m%d%H%M%S')
+    UNIQUE_RUN = run_name or time.strftime('%Y%m%d%H%M%S')
     output_table = output_directory / f'geocoding_results_{UNIQUE_RUN}.csv'
+    profile_table = output_directory / f'geocoding_profile_{UNIQUE_RUN}.csv'
+
+    settings = getattr(backend, 'settings', str(backend))
+    previous = {}
+    if previous_results is not None:
+        previous = _read_previous_results(Path(previous_results), settings, add_message)
+
+    with ExitStack() as stack:
+        writer = csv.writer(stack.enter_context(open(output_table, 'w+', newline='', encoding='utf-8')))
+        fingerprint_writer = _open_fingerprint_writer(stack, output_table, settings)
+        #: report the profile of failed jobs too
+        stack.callback(timer.report, add_message, profile_table)
 
-    with open(output_table, 'w+', newline='', encoding='utf-8') as result_file:
-        writer = csv.writer(result_file)
+        stack.enter_context(_run_profiler(profile_output, profile_table, add_message))
+        stack.enter_context(backend)
+
+        add_message(f'backend: {backend}')
+        add_message(f'backend settings: {settings}')
 
         writer.writerow(HEADER)
 
         start = time.perf_counter()
 
-        session = _get_retry_session()
-
         def write_error(primary_key, street, zone, error_message):
             nonlocal fail, total
             writer.writerow((primary_key, street, zone, 0, 0, 0, None, None, None, None, error_message))
+            timer.lap('write')
 
             fail += 1
             total += 1
@@ -190,68 +405,58 @@ def execute(
             if not ignore_failures and total == HEALTH_PROBE_COUNT and sequential_fails == HEALTH_PROBE_COUNT:
                 raise ContinuousFailThresholdExceeded()
 
-            url = url_template.substitute({'street': _cleanse_street(street), 'zone': _cleanse_zone(zone)})
+            timer.begin()
 
-            time.sleep(random.uniform(RATE_LIMIT_SECONDS[0], RATE_LIMIT_SECONDS[1]))
+            street_cleansed = _cleanse_street(street)
+            zone_cleansed = _cleanse_zone(zone)
 
-            try:
-                request = session.get(
-                    url,
-                    timeout=5,
-                    params={
-                        'apiKey': api_key,
-                        'spatialReference': spatial_reference,
-                        'locators': locators,
-                        'pobox': pobox,
-                        'acceptScore': acceptScore
-                    }
-                )
-
-                try:
-                    response = request.json()
-                except JSONDecodeError:
-                    write_error(primary_key, street, zone, f'Missing required parameters for URL: {request.url}')
+            fingerprint = _fingerprint(street_cleansed, zone_cleansed)
+            fingerprint_writer.writerow((primary_key, fingerprint))
 
-                    continue
+            previous_fingerprint, previous_fields = previous.get(str(primary_key), (None, None))
 
-                if request.status_code == 400:
-                    #: fail fast with api key auth
-                    raise InvalidAPIKeyException(total, primary_key, response['message'])
+            if fingerprint == previous_fingerprint:
+                timer.lap('cleanse')
 
-                if request.status_code != 200:
-                    sequential_fails += 1
+                #: the input columns are this run's values since only their cleansed form has to match
+                writer.writerow((primary_key, street, zone, *previous_fields[2:]))
+                timer.lap('write')
+                timer.end(primary_key, street, zone)
 
-                    write_error(primary_key, street, zone, response['message'])
+                carried += 1
 
-                    continue
+                continue
 
-                match = response['result']
-                match_score = match['score']
-                location = match['location']
-                match_address = match['matchAddress']
-                address_grid = match['addressGrid']
-                locator = match['locator']
-                standardized_address = match['inputAddress']
+            timer.lap('cleanse')
 
-                if 'standardizedAddress' in match:
-                    standardized_address = match['standardizedAddress']
+            try:
+                status_code, result = backend.geocode(street_cleansed, zone_cleansed, timer)
+
+                if status_code == 400:
+                    #: fail fast with api key auth
+                    raise InvalidAPIKeyException(total, primary_key, result)
 
-                match_x = location['x']
-                match_y = location['y']
+                if status_code != 200:
+                    sequential_fails += 1
+
+                    write_error(primary_key, street, zone, result)
+
+                    continue
 
                 sequential_fails = 0
                 success += 1
                 total += 1
-                score += match_score
+                score += result.score
 
-                writer.writerow((
-                    primary_key, street, zone, match_x, match_y, match_score, locator, match_address,
-                    standardized_address, address_grid, None
-                ))
+                writer.writerow(result.to_row(primary_key, street, zone))
+                timer.lap('write')
             except InvalidAPIKeyException as ex:
                 raise ex
             except Exception as ex:
+                timer.lap('error')
                 write_error(primary_key, street, zone, str(ex)[:500])
+            finally:
+                timer.end(primary_key, street, zone)
 
             if total % 10000 == 0:
                 log_status()
@@ -296,6 +501,244 @@ def get_remote_version():
     return response_json[VERSION_KEY]
 
 
+class WebApiBackend():
+    """Geocodes with the UGRC web API or a self-hosted mirror of it
+    """
+
+    def __init__(
+        self,
+        api_key,
+        host=HOST,
+        spatial_reference=DEFAULT_SPATIAL_REFERENCE,
+        locators=DEFAULT_LOCATOR_NAME,
+        pobox=DEFAULT_POBOX,
+        acceptScore=DEFAULT_ACCEPT_SCORE,
+        session_pool=None,
+        rate_limiters=None
+    ):
+        """session_pool: an optional pool with `get` and `put` methods to borrow a session from
+        rate_limiters: optional limiters with a `wait` method to use instead of the random sleep between requests
+        """
+        # pylint: disable=too-many-arguments
+        self.host = host
+        self.url = f'https://{host}/api/v1/geocode/'
+        self.params = {
+            'apiKey': api_key,
+            'spatialReference': spatial_reference,
+            'locators': locators,
+            'pobox': pobox,
+            'acceptScore': acceptScore
+        }
+        #: the query string is the same for every row so encode it once
+        self.query = urlencode(self.params)
+        self.session_pool = session_pool
+        self.rate_limiters = rate_limiters
+        self.session = None
+
+    @property
+    def settings(self):
+        """the settings that change the results of this backend. Everything but the api key
+        """
+        return f'{self.url}?' + urlencode({name: value for name, value in self.params.items() if name != 'apiKey'})
+
+    def __str__(self):
+        return f'web api ({self.host})'
+
+    def __enter__(self):
+        if self.session_pool is None:
+            self.session = _get_retry_session()
+        else:
+            self.session = self.session_pool.get()
+
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.session_pool is None:
+            self.session.close()
+        else:
+            self.session_pool.put(self.session)
+
+        self.session = None
+
+    def geocode(self, street, zone, timer):
+        """street: a cleansed street
+        zone: a cleansed zone
+        timer: the phase timer for the current row
+        returns the status code and a GeocodeResult or the error message from the api
+        """
+        url = f'{self.url}{quote(street)}/{quote(zone)}?{self.query}'
+
+        if self.rate_limiters is None:
+            time.sleep(random.uniform(RATE_LIMIT_SECONDS[0], RATE_LIMIT_SECONDS[1]))
+        else:
+            for rate_limiter in self.rate_limiters:
+                rate_limiter.wait()
+        timer.lap('wait')
+
+        request = self.session.get(url, timeout=5)
+        timer.lap('connect')
+        timer.carve('connect', 'server', _get_server_time_ns(request.headers))
+
+        try:
+            response = _loads(request.content)
+        except ValueError as ex:
+            raise ValueError(f'Missing required parameters for URL: {request.url}') from ex
+
+        if request.status_code != 200:
+            timer.lap('decode')
+
+            return request.status_code, response['message']
+
+        result = GeocodeResult.from_api(response['result'])
+        timer.lap('decode')
+
+        return 200, result
+
+
+class GeocodeResult():
+    """A lean record of a single match that can be written as a row of the results csv
+    """
+    __slots__ = ('match_x', 'match_y', 'score', 'locator', 'match_address', 'standardized_address', 'address_grid')
+
+    def __init__(self, match_x, match_y, score, locator, match_address, standardized_address, address_grid):
+        # pylint: disable=too-many-arguments
+        self.match_x = match_x
+        self.match_y = match_y
+        self.score = score
+        self.locator = locator
+        self.match_address = match_address
+        self.standardized_address = standardized_address
+        self.address_grid = address_grid
+
+    @classmethod
+    def from_api(cls, match):
+        """create a result from the `result` object of a web api response
+        """
+        location = match['location']
+
+        return cls(
+            location['x'], location['y'], match['score'], match['locator'], match['matchAddress'],
+            match.get('standardizedAddress', match['inputAddress']), match['addressGrid']
+        )
+
+    def to_row(self, primary_key, street, zone):
+        """returns the HEADER fields for this result
+        """
+        return (
+            primary_key, street, zone, self.match_x, self.match_y, self.score, self.locator, self.match_address,
+            self.standardized_address, self.address_grid, None
+        )
+
+
+class _PhaseTimer():
+    """Accumulates perf_counter_ns samples for each pipeline phase and keeps the slowest rows
+    """
+
+    def __init__(self, slowest=DEFAULT_PROFILE_SLOWEST):
+        self.slowest = slowest
+        self.totals = dict.fromkeys(PROFILE_PHASES, 0)
+        self.rows = 0
+        self.heap = []
+        self._row = None
+        self._mark = 0
+
+    def begin(self):
+        """start timing a row
+        """
+        self._row = dict.fromkeys(PROFILE_PHASES, 0)
+        self._mark = time.perf_counter_ns()
+
+    def lap(self, phase):
+        """attribute the time since the last lap to `phase`
+        """
+        now = time.perf_counter_ns()
+        elapsed = now - self._mark
+        self._mark = now
+
+        self._row[phase] += elapsed
+        self.totals[phase] += elapsed
+
+    def carve(self, source, phase, nanoseconds):
+        """move time already attributed to `source` over to `phase`
+        eg: the server time reported in the response headers is part of the connect round trip
+        """
+        nanoseconds = min(max(nanoseconds, 0), self._row[source])
+
+        for timings in (self._row, self.totals):
+            timings[source] -= nanoseconds
+            timings[phase] += nanoseconds
+
+    def end(self, primary_key, street, zone):
+        """finish timing a row and keep it if it is one of the slowest
+        """
+        if self._row is None:
+            return
+
+        self.rows += 1
+
+        if self.slowest > 0:
+            item = (sum(self._row.values()), self.rows, primary_key, street, zone, self._row)
+
+            if len(self.heap) < self.slowest:
+                heapq.heappush(self.heap, item)
+            else:
+                heapq.heappushpop(self.heap, item)
+
+        self._row = None
+
+    def report(self, add_message, path):
+        """send a summary table of the phase timings to `add_message` and write the slowest rows to `path`
+        """
+        total = sum(self.totals.values())
+
+        add_message(f'Profiled rows: {self.rows}')
+        add_message(f'{"phase":<10}{"total":>16}{"per row":>14}{"share":>8}')
+
+        for phase in PROFILE_PHASES:
+            elapsed = self.totals[phase]
+            per_row = elapsed / self.rows / 1e6 if self.rows else 0
+            share = round(100 * elapsed / total) if total else 0
+
+            add_message(f'{phase:<10}{_format_time(elapsed / 1e9):>16}{per_row:>11.3f} ms{share:>7}%')
+
+        if self.slowest > 0:
+            self.write_slowest(path)
+            add_message(f'Slowest rows: {path}')
+
+    def write_slowest(self, path):
+        """write the slowest rows and their phase timings in milliseconds to a csv
+        """
+        with open(path, 'w', newline='', encoding='utf-8') as profile_file:
+            writer = csv.writer(profile_file)
+
+            writer.writerow(('primary_key', 'input_street', 'input_zone', 'total_ms') +
+                            tuple(f'{phase}_ms' for phase in PROFILE_PHASES))
+
+            for row_total, _, primary_key, street, zone, timings in sorted(self.heap, reverse=True):
+                writer.writerow((primary_key, street, zone, row_total / 1e6) +
+                                tuple(timings[phase] / 1e6 for phase in PROFILE_PHASES))
+
+
+class _NullPhaseTimer(_PhaseTimer):
+    """A phase timer that records nothing for when profiling is off
+    """
+
+    def begin(self):
+        pass
+
+    def lap(self, phase):
+        pass
+
+    def carve(self, source, phase, nanoseconds):
+        pass
+
+    def end(self, primary_key, street, zone):
+        pass
+
+    def report(self, add_message, path):
+        pass
+
+
 class InvalidAPIKeyException(Exception):
     """Custom exception for invalid API key returned from api
     """
@@ -319,6 +762,7 @@ class ContinuousFailThresholdExceeded(Exception):
 
 if __name__ == '__main__':
     import argparse
+    import importlib
     parser = argparse.ArgumentParser(description='Geocode a csv')
 
     parser.add_argument('key', type=str)
@@ -332,25 +776,56 @@ if __name__ == '__main__':
     parser.add_argument('--pobox', default=DEFAULT_POBOX, type=str, action='store')
     parser.add_argument('--acceptScore', default=DEFAULT_ACCEPT_SCORE, type=int, action='store')
     parser.add_argument('--ignore-failures', action='store_true')
+    parser.add_argument('--host', default=HOST, type=str, action='store')
+    parser.add_argument('--address-points', default=None, type=str, action='store')
+    parser.add_argument('--address-points-street', default='address', type=str, action='store')
+    parser.add_argument('--address-points-zones', default=['zone'], type=str, nargs='+', action='store')
+    parser.add_argument('--address-points-x', default='x', type=str, action='store')
+    parser.add_argument('--address-points-y', default='y', type=str, action='store')
+    parser.add_argument('--previous-results', default=None, type=str, action='store')
+    parser.add_argument('--profile', action='store_true')
+    parser.add_argument('--profile-slowest', default=DEFAULT_PROFILE_SLOWEST, type=int, action='store')
+    parser.add_argument('--profile-output', default=None, choices=PROFILE_OUTPUTS, action='store')
 
     args = parser.parse_args()
 
-    def get_rows():
-        """open csv and yield data for geocoding
-        """
-        with open(args.csv) as input_file:
-            reader = csv.DictReader(input_file)
-            for row in reader:
-                yield (row[args.id], row[args.street], row[args.zone])
+    if args.address_points:
+        try:
+            address_points = importlib.import_module('address_points')
+        except ImportError:
+            address_points = importlib.import_module('agrcgeocoding.address_points')
+
+        geocoder = address_points.AddressPointBackend(
+            args.address_points,
+            street_field=args.address_points_street,
+            zone_fields=args.address_points_zones,
+            x_field=args.address_points_x,
+            y_field=args.address_points_y,
+            acceptScore=args.acceptScore
+        )
+    else:
+        geocoder = WebApiBackend(
+            args.key,
+            host=args.host,
+            spatial_reference=args.wkid,
+            locators=args.locators,
+            pobox=args.pobox,
+            acceptScore=args.acceptScore
+        )
 
     execute(
         args.key,
-        get_rows(),
+        _read_csv_rows(args.csv, args.id, args.street, args.zone),
         args.output,
         spatial_reference=args.wkid,
         locators=args.locators,
         pobox=args.pobox,
         acceptScore=args.acceptScore,
         add_message=print,
-        ignore_failures=args.ignore_failures
+        ignore_failures=args.ignore_failures,
+        profile=args.profile,
+        profile_slowest=args.profile_slowest,
+        profile_output=args.profile_output,
+        backend=geocoder,
+        previous_results=args.previous_results
     )
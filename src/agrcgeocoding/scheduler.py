@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# * coding: utf8 *
+"""
+Run many geocoding jobs concurrently while sharing a request budget across jobs and api keys.
+
+Usage: `scheduler.schedule([{'key', 'csv', 'id', 'street', 'zone', 'output'}, ...])`.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from queue import Empty, LifoQueue
+
+from .geocode import (DEFAULT_ACCEPT_SCORE, DEFAULT_LOCATOR_NAME, DEFAULT_POBOX, DEFAULT_SPATIAL_REFERENCE,
+                      RATE_LIMIT_SECONDS, WebApiBackend, _get_retry_session, _read_csv_rows, execute)
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_SECOND = 100
+DEFAULT_KEY_REQUESTS_PER_SECOND = round(2 / sum(RATE_LIMIT_SECONDS))
+REQUIRED_JOB_KEYS = ('key', 'csv', 'id', 'street', 'zone', 'output')
+
+
+def _build_queue(jobs, add_message):
+    """jobs: iterable of job dictionaries
+    add_message: the function that failed job messages are sent to
+    returns the valid jobs as (name, job) smallest input first and a dictionary of job name -> exception for the
+    jobs that can not be run
+    """
+    queue = []
+    failures = {}
+
+    def unique_name(job, position):
+        name = job.get('name') or (Path(job['csv']).stem if 'csv' in job else f'job_{position}')
+
+        if name in failures or name in (queued_name for queued_name, _, _ in queue):
+            name = f'{name}_{position}'
+
+        return name
+
+    for position, job in enumerate(jobs):
+        name = unique_name(job, position)
+        missing = [key for key in REQUIRED_JOB_KEYS if key not in job]
+
+        if missing:
+            failures[name] = ValueError(f'Job is missing {", ".join(missing)}')
+
+            continue
+
+        try:
+            size = Path(job['csv']).stat().st_size
+        except OSError as ex:
+            failures[name] = ex
+
+            continue
+
+        queue.append((size, name, job))
+
+    for name, ex in failures.items():
+        add_message(f'[{name}] Job Failed \n{ex}')
+
+    #: smallest jobs first so they are not stuck behind the big ones
+    queue.sort(key=lambda item: item[0])
+
+    return [(name, job) for _, name, job in queue], failures
+
+
+def _synchronized(add_message):
+    """returns a version of `add_message` that can be called from many threads
+    """
+    lock = threading.Lock()
+
+    def send_message(message):
+        with lock:
+            add_message(message)
+
+    return send_message
+
+
+def _run_job(name, job, run, session_pool, rate_limiters, add_message):
+    """geocode a single job and return its name and output csv path or the exception that stopped it
+    """
+    # pylint: disable=too-many-arguments
+
+    def job_message(message):
+        add_message(f'[{name}] {message}')
+
+    backend = WebApiBackend(
+        job['key'],
+        spatial_reference=job.get('wkid', DEFAULT_SPATIAL_REFERENCE),
+        locators=job.get('locators', DEFAULT_LOCATOR_NAME),
+        pobox=job.get('pobox', DEFAULT_POBOX),
+        acceptScore=job.get('acceptScore', DEFAULT_ACCEPT_SCORE),
+        session_pool=session_pool,
+        rate_limiters=rate_limiters
+    )
+
+    try:
+        return name, execute(
+            job['key'],
+            _read_csv_rows(job['csv'], job['id'], job['street'], job['zone']),
+            job['output'],
+            add_message=job_message,
+            ignore_failures=job.get('ignore_failures', False),
+            backend=backend,
+            run_name=f'{name}_{run}'
+        )
+    except Exception as ex:
+        job_message(f'Job Failed \n{ex}')
+
+        return name, ex
+
+
+def schedule(
+    jobs,
+    concurrency=DEFAULT_CONCURRENCY,
+    requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+    key_requests_per_second=DEFAULT_KEY_REQUESTS_PER_SECOND,
+    add_message=print
+):
+    """Geocode a queue of csv jobs concurrently.
+
+    jobs                    = iterable of dictionaries in this form:
+                              {'key', 'csv', 'id', 'street', 'zone', 'output'} with optional 'name', 'wkid',
+                              'locators', 'pobox', 'acceptScore' and 'ignore_failures'
+    concurrency             = the number of jobs that are geocoded at the same time
+    requests_per_second     = the request budget shared by all of the jobs
+    key_requests_per_second = the request budget shared by the jobs using the same api key
+    add_message             = the function that log messages are sent to. Messages are prefixed with the job name
+    returns a dictionary of job name -> output csv path or the exception that stopped the job
+    """
+    send_message = _synchronized(add_message)
+    queue, results = _build_queue(jobs, send_message)
+
+    global_limiter = _RateLimiter(requests_per_second)
+    key_limiters = {job['key']: _RateLimiter(key_requests_per_second) for _, job in queue}
+    session_pool = _SessionPool()
+    run = time.strftime('%Y%m%d%H%M%S')
+
+    send_message(f'Scheduling {len(queue)} jobs with {len(key_limiters)} api keys')
+
+    def run_job(named_job):
+        name, job = named_job
+
+        #: wait on the slower key budget first so that the global slot is not held while the key limiter sleeps
+        return _run_job(name, job, run, session_pool, (key_limiters[job['key']], global_limiter), send_message)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results.update(executor.map(run_job, queue))
+    finally:
+        session_pool.close()
+
+    send_message(
+        f'Completed {sum(1 for result in results.values() if not isinstance(result, Exception))} of {len(results)} jobs'
+    )
+
+    return results
+
+
+class _RateLimiter():
+    """Spaces requests out evenly so that all of the threads sharing it stay under a requests per second budget
+    """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, requests_per_second):
+        self.interval = 1 / requests_per_second
+        self.lock = threading.Lock()
+        self.next_slot = time.perf_counter()
+
+    def wait(self):
+        """sleep until the next free slot in the budget
+        """
+        with self.lock:
+            now = time.perf_counter()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class _SessionPool():
+    """Hands out retry sessions so their connections can be reused by the jobs that run after
+    """
+
+    def __init__(self):
+        self.sessions = LifoQueue()
+
+    def get(self):
+        """returns an idle session or a new one
+        """
+        try:
+            return self.sessions.get_nowait()
+        except Empty:
+            return _get_retry_session()
+
+    def put(self, session):
+        """return a session to the pool
+        """
+        self.sessions.put(session)
+
+    def close(self):
+        """close all of the idle sessions
+        """
+        while not self.sessions.empty():
+            self.sessions.get_nowait().close()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# * coding: utf8 *
+"""
+test_address_points.py
+A module that contains tests for the address points module.
+"""
+#pylint: disable=missing-function-docstring
+#pylint: disable=protected-access
+#pylint: disable=redefined-outer-name
+
+import csv
+from pathlib import Path
+
+import pytest
+
+from agrcgeocoding import address_points, geocode
+
+
+def test_tokenize_address():
+    assert address_points._tokenize_address('123 south main street') == ('123', ['S', 'MAIN', 'ST'])
+    assert address_points._tokenize_address('main street') == (None, ['MAIN', 'ST'])
+
+
+@pytest.fixture
+def address_point_csv(tmpdir):
+    address_point_csv = Path(tmpdir) / 'address_points.csv'
+    with address_point_csv.open(mode='w', newline='') as address_file:
+        writer = csv.writer(address_file)
+        writer.writerow(('address', 'city', 'zip', 'x', 'y'))
+        writer.writerow(('123 S MAIN ST', 'SALT LAKE CITY', '84111', '425046.48', '4514424.97'))
+        writer.writerow(('123 N MAIN ST', 'SALT LAKE CITY', '84103', '425050.00', '4515000.00'))
+        writer.writerow(('259 W MAIN', 'DELTA', '84624', '360000.00', '4350000.00'))
+
+    return address_point_csv
+
+
+def test_address_point_backend(tmpdir, address_point_csv):
+    backend = address_points.AddressPointBackend(address_point_csv, zone_fields=('city', 'zip'))
+    rows = [
+        (1, '123 South Main Street', 'Salt Lake City'),
+        (2, '123 north main', '84103-1234'),
+        (3, '259 w main st', 'delta'),
+        (4, '999 nowhere', 'delta'),
+    ]
+
+    messages = []
+
+    table = Path(geocode.execute(None, rows, tmpdir, add_message=messages.append, backend=backend))
+    with table.open() as results:
+        reader = {row['primary_key']: row for row in csv.DictReader(results)}
+
+    assert reader['1']['score'] == '100'
+    assert reader['1']['x'] == '425046.48'
+    assert reader['1']['locator'] == address_points.LOCAL_LOCATOR_NAME
+    assert reader['1']['standardizedAddress'] == '123 s main st'
+    assert reader['2']['y'] == '4515000.0'
+    assert reader['2']['addressGrid'] == '84103'
+    assert reader['3']['score'] == '95'
+    assert reader['4']['message'].startswith('No address candidates found with a score of 70')
+    assert f'backend settings: {backend.settings}' in messages
+
+
+def test_address_point_backend_accept_score(address_point_csv):
+    with address_points.AddressPointBackend(address_point_csv, zone_fields=('city',), acceptScore=100) as backend:
+        status_code, _ = backend.geocode('259 w main st', 'delta', geocode._NullPhaseTimer())
+
+    assert status_code == 404
+
+
+def test_address_point_backend_keeps_grid_addresses_apart(tmpdir):
+    address_point_csv = Path(tmpdir) / 'grid.csv'
+    with address_point_csv.open(mode='w', newline='') as address_file:
+        writer = csv.writer(address_file)
+        writer.writerow(('address', 'zone', 'x', 'y'))
+        writer.writerow(('100 E 200 S', 'SALT LAKE CITY', '1', '1'))
+        writer.writerow(('100 S 200 E', 'SALT LAKE CITY', '2', '2'))
+
+    with address_points.AddressPointBackend(address_point_csv) as backend:
+        timer = geocode._NullPhaseTimer()
+        east_status, east = backend.geocode('100 east 200 south', 'salt lake city', timer)
+        south_status, south = backend.geocode('100 s 200 e', 'salt lake city', timer)
+
+    assert (east_status, east.match_x, east.score) == (200, 1.0, 100)
+    assert (south_status, south.match_x, south.score) == (200, 2.0, 100)
+
+    south_street = address_points._parse_street(['S', '200', 'E'])
+    east_street = address_points._parse_street(['E', '200', 'S'])
+    assert address_points._score_street(south_street, east_street) < geocode.DEFAULT_ACCEPT_SCORE
+
+
+def test_address_point_backend_skips_bad_points(tmpdir):
+    address_point_csv = Path(tmpdir) / 'bad.csv'
+    with address_point_csv.open(mode='w', newline='') as address_file:
+        writer = csv.writer(address_file)
+        writer.writerow(('zone', 'x', 'y', 'address'))
+        writer.writerow(('DELTA', '', '4514424.97', '123 S MAIN ST'))
+        writer.writerow(('DELTA', '1', '1', 'MAIN ST'))
+        writer.writerow(('DELTA', '360000', '4350000', '259 W MAIN'))
+        writer.writerow(('DELTA', '1', '1'))
+
+    with address_points.AddressPointBackend(address_point_csv) as backend:
+        status_code, _ = backend.geocode('259 w main', 'delta', geocode._NullPhaseTimer())
+
+    assert status_code == 200
+    assert backend.skipped == 3
+    assert str(backend).endswith('3 points skipped)')
+
+
+def test_address_point_backend_checks_fields(address_point_csv):
+    backend = address_points.AddressPointBackend(
+        address_point_csv, street_field='street', zone_fields=('city', 'county')
+    )
+
+    with pytest.raises(ValueError, match='is missing the street, county fields'):
+        backend.build_index()
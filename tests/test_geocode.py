@@ -8,9 +8,13 @@ A module that contains tests for the geocoding module.
 #pylint: disable=protected-access
 
 import csv
+import json
+import os
+import time
 from pathlib import Path
 
 import pytest
+import requests
 
 from agrcgeocoding import geocode
 
@@ -175,3 +179,334 @@ def test_generic_exception(tmpdir, requests_mock):
 
         row = next(reader)
         assert exception_message == row['message']
+
+
+@pytest.mark.parametrize(
+    'headers,expected', [
+        ({'Server-Timing': 'db;dur=2.5, total;dur=12.25'}, 12250000),
+        ({'X-Response-Time': '8ms'}, 8000000),
+        ({}, 0),
+    ]
+)
+def test_get_server_time_ns(headers, expected):
+    assert geocode._get_server_time_ns(headers) == expected
+
+
+def test_phase_timer_carve_is_bounded():
+    timer = geocode._PhaseTimer()
+    timer.begin()
+    timer.lap('connect')
+    connect = timer.totals['connect']
+
+    timer.carve('connect', 'server', connect * 10)
+
+    assert timer.totals['connect'] == 0
+    assert timer.totals['server'] == connect
+
+
+def test_profile_run(tmpdir, requests_mock):
+    response = {
+        'status': 200,
+        'result': {
+            'location': {
+                'x': 425046.4843,
+                'y': 4514424.973
+            },
+            'score': 100,
+            'locator': 'USPS Delivery Points',
+            'matchAddress': 'UTAH STATE CAPITOL',
+            'inputAddress': '123 S MAIN',
+            'addressGrid': 'SALT LAKE CITY'
+        }
+    }
+    street = 'dummystreet'
+    zone = 'dummyzone'
+    requests_mock.get(
+        f'/api/v1/geocode/{street}/{zone}', json=response, status_code=200, headers={'Server-Timing': 'total;dur=1'}
+    )
+    messages = []
+
+    rows = [(i, street, zone) for i in range(10)]
+    geocode.execute(
+        'key', rows, tmpdir, add_message=messages.append, profile=True, profile_slowest=3, profile_output='cprofile'
+    )
+
+    assert 'Profiled rows: 10' in messages
+    for phase in geocode.PROFILE_PHASES:
+        assert any(message.startswith(phase) for message in messages)
+
+    profile_table = next(Path(tmpdir).glob('geocoding_profile_*.csv'))
+    with profile_table.open() as profile_file:
+        timings = list(csv.DictReader(profile_file))
+
+    assert len(timings) == 3
+    assert float(timings[0]['total_ms']) >= float(timings[-1]['total_ms'])
+    assert float(timings[0]['wait_ms']) > 0
+
+    assert len(list(Path(tmpdir).glob('geocoding_profile_*.prof'))) == 1
+
+
+def test_profile_records_errors_in_their_own_phase(tmpdir):
+
+    class BrokenBackend():
+        """a backend that fails every row after 10ms
+        """
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            pass
+
+        def geocode(self, *_):
+            time.sleep(0.01)
+
+            raise KeyError('result')
+
+    geocode.execute(
+        'key', [(1, 'street', 'zone')],
+        tmpdir,
+        add_message=lambda message: None,
+        profile=True,
+        profile_slowest=1,
+        backend=BrokenBackend()
+    )
+
+    profile_table = next(Path(tmpdir).glob('geocoding_profile_*.csv'))
+    with profile_table.open() as profile_file:
+        timings = next(csv.DictReader(profile_file))
+
+    assert float(timings['error_ms']) >= 10
+    assert float(timings['connect_ms']) == 0
+
+
+def test_profile_reports_failed_jobs(tmpdir, requests_mock):
+    invalid_key = {'status': 400, 'message': 'Invalid API key.'}
+    requests_mock.get('/api/v1/geocode/123 s main/84111', json=invalid_key, status_code=400)
+    messages = []
+
+    with pytest.raises(geocode.InvalidAPIKeyException):
+        geocode.execute('bad', [(1, '123 s main', '84111')], tmpdir, add_message=messages.append, profile=True)
+
+    assert 'Profiled rows: 1' in messages
+
+
+def test_invalid_profile_output(tmpdir):
+    with pytest.raises(ValueError):
+        geocode.execute('key', [], tmpdir, add_message=lambda message: None, profile=True, profile_output='nope')
+
+
+def test_web_api_backend_host(tmpdir, requests_mock):
+    response = {'status': 404, 'message': 'No address candidates found with a score of 70 or better.'}
+    requests_mock.get('https://geocoding.mirror.local/api/v1/geocode/street/84124', json=response, status_code=404)
+    backend = geocode.WebApiBackend('key', host='geocoding.mirror.local')
+
+    table = Path(geocode.execute('key', [(1, 'street', '84124')], tmpdir, backend=backend))
+    with table.open() as results:
+        row = next(csv.DictReader(results))
+
+    assert row['message'] == response['message']
+
+
+def write_fingerprints(results, settings):
+    with geocode._get_fingerprint_path(results).open(mode='w', newline='') as fingerprint_file:
+        writer = csv.writer(fingerprint_file)
+        writer.writerow(('primary_key', 'fingerprint', settings))
+
+        with results.open() as results_file:
+            for row in csv.DictReader(results_file):
+                writer.writerow((row['primary_key'], geocode._fingerprint(row['input_street'], row['input_zone'])))
+
+
+def test_incremental_run(tmpdir, requests_mock):
+    response = {
+        'status': 200,
+        'result': {
+            'location': {
+                'x': 1,
+                'y': 2
+            },
+            'score': 100,
+            'locator': 'USPS Delivery Points',
+            'matchAddress': 'NEW MATCH',
+            'inputAddress': '123 S MAIN',
+            'addressGrid': 'SALT LAKE CITY'
+        }
+    }
+    requests_mock.get('/api/v1/geocode/123 s main/84111', json=response, status_code=200)
+    requests_mock.get('/api/v1/geocode/9 new st/84111', json=response, status_code=200)
+    requests_mock.get('/api/v1/geocode/failed st/84111', json=response, status_code=200)
+
+    previous_results = Path(tmpdir) / 'previous.csv'
+    with previous_results.open(mode='w', newline='') as previous_file:
+        writer = csv.writer(previous_file)
+        writer.writerow(geocode.HEADER)
+        writer.writerow((1, '1 unchanged st', '84111', 10, 20, 90, 'locator', 'OLD MATCH', 'old', 'SLC', ''))
+        writer.writerow((2, '123 n main', '84111', 10, 20, 90, 'locator', 'OLD MATCH', 'old', 'SLC', ''))
+        writer.writerow((3, 'deleted st', '84111', 10, 20, 90, 'locator', 'OLD MATCH', 'old', 'SLC', ''))
+        writer.writerow((4, 'failed st', '84111', 0, 0, 0, '', '', '', '', 'timed out'))
+
+    write_fingerprints(previous_results, geocode.WebApiBackend('key').settings)
+
+    rows = [(1, '1  Unchanged st', '84111-1234'), (2, '123 s main', '84111'), (4, 'failed st', '84111'),
+            (5, '9 new st', '84111')]
+    messages = []
+
+    output = Path(tmpdir) / 'output'
+    output.mkdir()
+    table = geocode.execute('key', rows, output, add_message=messages.append, previous_results=previous_results)
+
+    with table.open() as results:
+        results = {row['primary_key']: row for row in csv.DictReader(results)}
+
+    assert list(results) == ['1', '2', '4', '5']
+    assert results['1']['matchAddress'] == 'OLD MATCH'
+    assert results['1']['input_street'] == '1  Unchanged st'
+    assert results['1']['input_zone'] == '84111-1234'
+    assert results['2']['matchAddress'] == 'NEW MATCH'
+    assert results['4']['matchAddress'] == 'NEW MATCH'
+    assert results['5']['matchAddress'] == 'NEW MATCH'
+    assert requests_mock.call_count == 3
+    assert 'Carried forward: 1' in messages
+
+    fingerprints = geocode._get_fingerprint_path(table)
+    with fingerprints.open() as fingerprint_file:
+        assert len(list(csv.reader(fingerprint_file))) == 5
+
+    previous = geocode._read_previous_results(table, geocode.WebApiBackend('key').settings, messages.append)
+    assert previous['1'][0] == geocode._fingerprint('1 Unchanged st', '84111')
+
+
+def test_incremental_run_from_a_previous_run(tmpdir, requests_mock):
+    response = {
+        'status': 200,
+        'result': {
+            'location': {
+                'x': 1,
+                'y': 2
+            },
+            'score': 100,
+            'locator': 'USPS Delivery Points',
+            'matchAddress': 'MATCH',
+            'inputAddress': '123 S MAIN',
+            'addressGrid': 'SALT LAKE CITY'
+        }
+    }
+    requests_mock.get('/api/v1/geocode/123 s main/84111', json=response, status_code=200)
+
+    rows = [(1, '123 s main', '84111'), (2, '123 S Main', '84111')]
+    output = Path(tmpdir)
+    first = geocode.execute('key', rows, output, add_message=print, run_name='first')
+
+    messages = []
+    second = geocode.execute(
+        'key', rows, output, add_message=messages.append, previous_results=first, run_name='second'
+    )
+
+    assert requests_mock.call_count == 2
+    assert 'Carried forward: 2' in messages
+    with first.open() as first_results, second.open() as second_results:
+        assert list(csv.reader(first_results)) == list(csv.reader(second_results))
+
+
+@pytest.mark.parametrize('settings', [None, geocode.WebApiBackend('key', spatial_reference=3857).settings])
+def test_incremental_run_with_different_settings(tmpdir, requests_mock, settings):
+    requests_mock.get('/api/v1/geocode/1 unchanged st/84111', json={'status': 404, 'message': 'none'}, status_code=404)
+
+    previous_results = Path(tmpdir) / 'previous.csv'
+    with previous_results.open(mode='w', newline='') as previous_file:
+        writer = csv.writer(previous_file)
+        writer.writerow(geocode.HEADER)
+        writer.writerow((1, '1 unchanged st', '84111', 10, 20, 90, 'locator', 'OLD MATCH', 'old', 'SLC', ''))
+
+    if settings:
+        write_fingerprints(previous_results, settings)
+
+    messages = []
+    output = Path(tmpdir) / 'output'
+    output.mkdir()
+    geocode.execute(
+        'key', [(1, '1 unchanged st', '84111')], output, add_message=messages.append, previous_results=previous_results
+    )
+
+    assert requests_mock.call_count == 1
+    assert 'Carried forward: 0' in messages
+    assert any(message.endswith('Geocoding every row.') for message in messages)
+
+
+BENCHMARK_CONTENT = json.dumps({
+    'status': 200,
+    'result': {
+        'location': {
+            'x': 425046.4843,
+            'y': 4514424.973
+        },
+        'score': 100,
+        'locator': 'USPS Delivery Points',
+        'matchAddress': 'UTAH STATE CAPITOL',
+        'inputAddress': '123 S MAIN',
+        'standardizedAddress': '123 south main',
+        'addressGrid': 'SALT LAKE CITY'
+    }
+}).encode('utf-8')
+
+
+def original_response_path():
+    """a copy of the per row url encoding and response handling from before GeocodeResult, kept as a reference
+    """
+    request = requests.models.PreparedRequest()
+    request.prepare_url(
+        f'https://{geocode.HOST}/api/v1/geocode/123 s main/84111', {
+            'apiKey': 'key',
+            'spatialReference': geocode.DEFAULT_SPATIAL_REFERENCE,
+            'locators': geocode.DEFAULT_LOCATOR_NAME,
+            'pobox': geocode.DEFAULT_POBOX,
+            'acceptScore': geocode.DEFAULT_ACCEPT_SCORE
+        }
+    )
+    response = requests.models.Response()
+    response._content = BENCHMARK_CONTENT
+    response.encoding = 'utf-8'
+
+    match = response.json()['result']
+    location = match['location']
+    standardized_address = match['inputAddress']
+    if 'standardizedAddress' in match:
+        standardized_address = match['standardizedAddress']
+
+    return (
+        1, '123 s main', '84111', location['x'], location['y'], match['score'], match['locator'],
+        match['matchAddress'], standardized_address, match['addressGrid'], None
+    )
+
+
+def response_path(backend=geocode.WebApiBackend('key')):
+    """the per row url encoding and response handling of WebApiBackend
+    """
+    request = requests.models.PreparedRequest()
+    request.prepare_url(f'{backend.url}{geocode.quote("123 s main")}/84111?{backend.query}', None)
+
+    result = geocode.GeocodeResult.from_api(geocode._loads(BENCHMARK_CONTENT)['result'])
+
+    return result.to_row(1, '123 s main', '84111')
+
+
+def test_response_path_matches_original():
+    assert response_path() == original_response_path()
+
+
+@pytest.mark.skipif(not os.environ.get('GEOCODE_BENCHMARK'), reason='set GEOCODE_BENCHMARK=1 to run the benchmark')
+def test_response_handling_benchmark(capsys):
+    iterations = 2000
+
+    def cost(function):
+        start = time.process_time_ns()
+        for _ in range(iterations):
+            function()
+
+        return (time.process_time_ns() - start) / iterations / 1000
+
+    with capsys.disabled():
+        print(
+            f'\nper row cpu cost before: {cost(original_response_path):.1f} us after: {cost(response_path):.1f} us'
+        )
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# * coding: utf8 *
+"""
+test_scheduler.py
+A module that contains tests for the scheduler module.
+"""
+#pylint: disable=missing-function-docstring
+#pylint: disable=protected-access
+
+import csv
+import time
+from pathlib import Path
+
+from agrcgeocoding import geocode, scheduler
+
+
+def test_rate_limiter_spaces_requests():
+    rate_limiter = scheduler._RateLimiter(100)
+
+    start = time.perf_counter()
+    for _ in range(11):
+        rate_limiter.wait()
+
+    assert time.perf_counter() - start >= 0.09
+
+
+def test_session_pool_reuses_sessions():
+    session_pool = scheduler._SessionPool()
+    session = session_pool.get()
+    session_pool.put(session)
+
+    assert session_pool.get() is session
+
+    session_pool.close()
+
+
+def test_schedule_waits_on_the_key_limiter_first(tmpdir, requests_mock, monkeypatch):
+    requests_mock.get('/api/v1/geocode/123 s main/84111', json={'status': 404, 'message': 'none'}, status_code=404)
+    waits = []
+
+    class RecordingLimiter():
+
+        def __init__(self, requests_per_second):
+            self.requests_per_second = requests_per_second
+
+        def wait(self):
+            waits.append(self.requests_per_second)
+
+    monkeypatch.setattr(scheduler, '_RateLimiter', RecordingLimiter)
+
+    path = Path(tmpdir) / 'job.csv'
+    with path.open(mode='w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(('id', 'street', 'zone'))
+        writer.writerow((1, '123 s main', '84111'))
+
+    job = {'key': 'one', 'csv': path, 'id': 'id', 'street': 'street', 'zone': 'zone', 'output': tmpdir}
+    scheduler.schedule([job], requests_per_second=1000, key_requests_per_second=10, add_message=lambda _: None)
+
+    assert waits == [10, 1000]
+
+
+def test_schedule(tmpdir, requests_mock):
+    response = {
+        'status': 200,
+        'result': {
+            'location': {
+                'x': 425046,
+                'y': 4514424
+            },
+            'score': 100,
+            'locator': 'AddressPoints.AddressGrid',
+            'matchAddress': '123 S MAIN ST',
+            'inputAddress': '123 S MAIN',
+            'addressGrid': 'SALT LAKE CITY'
+        }
+    }
+    requests_mock.get('/api/v1/geocode/123 s main/84111', json=response, status_code=200)
+    invalid_key = {'status': 400, 'message': 'Invalid API key.'}
+    requests_mock.get('/api/v1/geocode/123 s main/84111?apiKey=bad', json=invalid_key, status_code=400)
+
+    def write_csv(name, count):
+        path = Path(tmpdir) / f'{name}.csv'
+        with path.open(mode='w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(('id', 'street', 'zone'))
+            for i in range(count):
+                writer.writerow((i, '123 s main', '84111'))
+
+        return path
+
+    fields = {'id': 'id', 'street': 'street', 'zone': 'zone', 'output': tmpdir}
+    jobs = [
+        {'key': 'one', 'csv': write_csv('big', 20), **fields},
+        {'key': 'two', 'csv': write_csv('small', 5), **fields},
+        {'key': 'bad', 'csv': write_csv('broken', 10), **fields},
+    ]
+    messages = []
+
+    results = scheduler.schedule(jobs, concurrency=2, requests_per_second=1000, add_message=messages.append)
+
+    assert isinstance(results['broken'], geocode.InvalidAPIKeyException)
+    for name, count in (('big', 20), ('small', 5)):
+        with results[name].open() as results_file:
+            assert len(list(csv.DictReader(results_file))) == count
+
+    started = [message for message in messages if message.endswith(f'output_directory: {tmpdir}')]
+    assert started.index(f'[small] output_directory: {tmpdir}') < started.index(f'[big] output_directory: {tmpdir}')
+    assert messages[-1] == 'Completed 2 of 3 jobs'
+
+
+def test_schedule_reports_bad_jobs_without_stopping_the_others(tmpdir, requests_mock):
+    response = {'status': 404, 'message': 'No address candidates found with a score of 70 or better.'}
+    requests_mock.get('/api/v1/geocode/123 s main/84111', json=response, status_code=404)
+
+    good = Path(tmpdir) / 'good.csv'
+    with good.open(mode='w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(('id', 'street', 'zone'))
+        writer.writerow((1, '123 s main', '84111'))
+
+    fields = {'id': 'id', 'street': 'street', 'zone': 'zone', 'output': tmpdir}
+    jobs = [
+        {'key': 'one', 'csv': Path(tmpdir) / 'missing.csv', **fields},
+        {'csv': good, 'name': 'no key', **fields},
+        {'key': 'one', 'csv': good, **fields},
+    ]
+    messages = []
+
+    results = scheduler.schedule(jobs, requests_per_second=1000, add_message=messages.append)
+
+    assert isinstance(results['missing'], FileNotFoundError)
+    assert isinstance(results['no key'], ValueError)
+    assert results['good'].exists()
+    assert '[no key] Job Failed \nJob is missing key' in messages
+    assert messages[-1] == 'Completed 1 of 3 jobs'